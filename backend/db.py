@@ -5,15 +5,21 @@ durable, browsable history. Chat/message rows live in a SQLite file; image
 *bytes* live as files on disk (deduped by sha256 content hash) with a `hash`
 registry row. Thumbnails (generated client-side) are stored under the same hash.
 
-`sqlite3` and `hashlib` are stdlib — no new dependencies.
+`sqlite3` and `hashlib` are stdlib — no required dependencies (pybase64 is optional).
 """
-import base64
 import hashlib
 import sqlite3
 import time
 import uuid
 from pathlib import Path
 
+# pybase64 is an optional SIMD decoder for the multi-megabyte image uploads;
+# the stdlib function has the same signature and is the fallback.
+try:
+    from pybase64 import b64decode
+except ImportError:
+    from base64 import b64decode
+
 # --------------------------------------------------------------------------- #
 # Paths
 # --------------------------------------------------------------------------- #
@@ -105,7 +111,7 @@ def _strip_data_url(data_url: str) -> bytes:
     """Decode a `data:image/...;base64,XXXX` string (or raw base64) to bytes."""
     comma = data_url.find(",")
     b64 = data_url[comma + 1 :] if comma >= 0 else data_url
-    return base64.b64decode(b64)
+    return b64decode(b64)
 
 
 def save_image(full_data_url: str, thumb_data_url: str | None = None) -> str:
@@ -114,17 +120,22 @@ def save_image(full_data_url: str, thumb_data_url: str | None = None) -> str:
     Returns the sha256 hash. Both the full image and its thumbnail are stored
     under the same hash so the sidebar can request `/api/thumbs/<hash>.jpg`.
     """
-    raw = _strip_data_url(full_data_url)
+    thumb = _strip_data_url(thumb_data_url) if thumb_data_url else None
+    return save_image_bytes(_strip_data_url(full_data_url), thumb)
+
+
+def save_image_bytes(raw: bytes, thumb: bytes | None = None) -> str:
+    """Same as save_image, for callers that already hold the JPEG bytes."""
     h = hashlib.sha256(raw).hexdigest()
 
     full_path = IMAGES_DIR / f"{h}.jpg"
     if not full_path.exists():
         full_path.write_bytes(raw)
 
-    if thumb_data_url:
+    if thumb:
         thumb_path = THUMBS_DIR / f"{h}.jpg"
         if not thumb_path.exists():
-            thumb_path.write_bytes(_strip_data_url(thumb_data_url))
+            thumb_path.write_bytes(thumb)
 
     with _connect() as conn:
         conn.execute(
@@ -175,23 +186,45 @@ def list_chats() -> list[dict]:
         chats = conn.execute(
             "SELECT id, title, model, updated_at FROM chats ORDER BY updated_at DESC"
         ).fetchall()
-        out = []
-        for c in chats:
-            icons = [
-                f"/api/thumbs/{h}.jpg" for h in _pinned_hashes(conn, c["id"])[:3]
-            ]
-            out.append(
-                {
-                    "id": c["id"],
-                    "title": c["title"],
-                    "model": c["model"],
-                    "updated_at": c["updated_at"],
-                    "icons": icons,
-                }
-            )
+        # Every chat's first three pinned images in one query, not one per chat.
+        icons: dict[str, list[str]] = {}
+        for r in conn.execute(
+            "SELECT chat_id, image_hash FROM chat_pinned_images "
+            "WHERE ordinal < 3 ORDER BY chat_id, ordinal"
+        ):
+            icons.setdefault(r["chat_id"], []).append(f"/api/thumbs/{r['image_hash']}.jpg")
+        out = [
+            {
+                "id": c["id"],
+                "title": c["title"],
+                "model": c["model"],
+                "updated_at": c["updated_at"],
+                "icons": icons.get(c["id"], []),
+            }
+            for c in chats
+        ]
         return out
 
 
+def _images_by_message(
+    conn: sqlite3.Connection, table: str, chat_id: str
+) -> dict[str, list[str]]:
+    """Image URLs for every message of a chat, grouped by message id.
+
+    One query per table instead of one per message keeps opening a long chat
+    at two round-trips regardless of its length.
+    """
+    out: dict[str, list[str]] = {}
+    for r in conn.execute(
+        f"SELECT mi.message_id, mi.image_hash FROM {table} mi "
+        "JOIN messages m ON m.id = mi.message_id "
+        "WHERE m.chat_id = ? ORDER BY mi.message_id, mi.ordinal",
+        (chat_id,),
+    ):
+        out.setdefault(r["message_id"], []).append(f"/api/images/{r['image_hash']}.jpg")
+    return out
+
+
 def get_chat(chat_id: str) -> dict | None:
     """Full chat detail with image URLs (not bytes)."""
     with _connect() as conn:
@@ -199,27 +232,20 @@ def get_chat(chat_id: str) -> dict | None:
         if not c:
             return None
 
-        messages = []
-        for m in conn.execute(
-            "SELECT * FROM messages WHERE chat_id = ? ORDER BY ordinal", (chat_id,)
-        ):
-            imgs = conn.execute(
-                "SELECT image_hash FROM message_images WHERE message_id = ? ORDER BY ordinal",
-                (m["id"],),
-            )
-            ctx = conn.execute(
-                "SELECT image_hash FROM message_context_images WHERE message_id = ? ORDER BY ordinal",
-                (m["id"],),
-            )
-            messages.append(
-                {
-                    "role": m["role"],
-                    "content": m["content"],
-                    "model": m["model"],
-                    "images": [f"/api/images/{r['image_hash']}.jpg" for r in imgs],
-                    "context_images": [f"/api/images/{r['image_hash']}.jpg" for r in ctx],
-                }
+        imgs = _images_by_message(conn, "message_images", chat_id)
+        ctx = _images_by_message(conn, "message_context_images", chat_id)
+        messages = [
+            {
+                "role": m["role"],
+                "content": m["content"],
+                "model": m["model"],
+                "images": imgs.get(m["id"], []),
+                "context_images": ctx.get(m["id"], []),
+            }
+            for m in conn.execute(
+                "SELECT * FROM messages WHERE chat_id = ? ORDER BY ordinal", (chat_id,)
             )
+        ]
 
         pinned = [f"/api/images/{h}.jpg" for h in _pinned_hashes(conn, chat_id)]
         sys_img = (
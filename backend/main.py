@@ -28,10 +28,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class ContentAddressedFiles(StaticFiles):
+    """StaticFiles for `<sha256>.jpg` files, whose bytes never change for a name.
+
+    Marking them immutable lets the browser reuse a fetched image across chat
+    reopens and thumbnail lists without even a conditional revalidation.
+    """
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200:
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
 # Serve persisted image bytes / thumbnails as static files. Registered before
 # the catch-all frontend mount so `/api/*` always wins.
-app.mount("/api/images", StaticFiles(directory=str(db.IMAGES_DIR)), name="images")
-app.mount("/api/thumbs", StaticFiles(directory=str(db.THUMBS_DIR)), name="thumbs")
+app.mount(
+    "/api/images", ContentAddressedFiles(directory=str(db.IMAGES_DIR)), name="images"
+)
+app.mount(
+    "/api/thumbs", ContentAddressedFiles(directory=str(db.THUMBS_DIR)), name="thumbs"
+)
 
 
 # --------------------------------------------------------------------------- #
@@ -47,6 +66,7 @@ class ChatRequest(BaseModel):
     model: str
     messages: list[Message]
     ollama_url: str = oc.DEFAULT_URL
+    keep_alive: int | None = None  # seconds; None = Ollama's default
 
 
 class PullRequest(BaseModel):
@@ -81,6 +101,7 @@ class MessageAppend(BaseModel):
 class TitleRequest(BaseModel):
     model: str
     ollama_url: str = oc.DEFAULT_URL
+    keep_alive: int | None = None  # same setting as the chat it names
 
 
 class GenerateRequest(BaseModel):
@@ -103,10 +124,7 @@ class GenerateRequest(BaseModel):
 # --------------------------------------------------------------------------- #
 @app.get("/api/models")
 def get_models(ollama_url: str = oc.DEFAULT_URL):
-    return {
-        "vision": oc.list_vision_models(ollama_url),
-        "all": oc.list_all_models(ollama_url),
-    }
+    return oc.list_models(ollama_url)
 
 
 @app.post("/api/chat")
@@ -115,7 +133,9 @@ def chat(req: ChatRequest):
 
     def gen():
         try:
-            for event in oc.stream_chat(req.ollama_url, req.model, messages):
+            for event in oc.stream_chat(
+                req.ollama_url, req.model, messages, keep_alive=req.keep_alive
+            ):
                 yield json.dumps(event) + "\n"
         except Exception as exc:  # surfaced inline so the client can show it
             yield json.dumps({"type": "error", "message": str(exc)}) + "\n"
@@ -142,7 +162,7 @@ def delete_model(name: str, ollama_url: str = oc.DEFAULT_URL):
 @app.post("/api/models/unload")
 def unload_models(ollama_url: str = oc.DEFAULT_URL):
     try:
-        return {"unloaded": oc.unload_all(ollama_url)}
+        return oc.unload_all(ollama_url)
     except Exception as exc:
         raise HTTPException(status_code=502, detail=str(exc))
 
@@ -169,6 +189,31 @@ def generate_unload():
     return {"ok": True}
 
 
+def _threaded_events(work):
+    """Run `work(emit)` in a worker thread and yield its events as NDJSON lines.
+
+    For long synchronous jobs (downloads, diffusion) that report progress via
+    callbacks: the worker pushes events onto a queue this generator drains, and
+    an exception becomes a final {"type": "error"} event.
+    """
+    events: queue.Queue = queue.Queue()
+
+    def worker():
+        try:
+            work(events.put)
+        except Exception as exc:
+            events.put({"type": "error", "message": str(exc)})
+        finally:
+            events.put(None)  # sentinel: worker done
+
+    threading.Thread(target=worker, daemon=True).start()
+    while True:
+        item = events.get()
+        if item is None:
+            break
+        yield json.dumps(item) + "\n"
+
+
 class SdPullRequest(BaseModel):
     model: str
 
@@ -179,26 +224,11 @@ def generate_pull(req: SdPullRequest):
     if not sd.available():
         raise HTTPException(status_code=503, detail="Image generation deps not installed.")
 
-    def gen():
-        events: queue.Queue = queue.Queue()
-
-        def worker():
-            try:
-                sd.pull(req.model, on_status=lambda m: events.put({"type": "status", "message": m}))
-                events.put({"type": "done"})
-            except Exception as exc:
-                events.put({"type": "error", "message": str(exc)})
-            finally:
-                events.put(None)
-
-        threading.Thread(target=worker, daemon=True).start()
-        while True:
-            item = events.get()
-            if item is None:
-                break
-            yield json.dumps(item) + "\n"
+    def work(emit):
+        sd.pull(req.model, on_status=lambda m: emit({"type": "status", "message": m}))
+        emit({"type": "done"})
 
-    return StreamingResponse(gen(), media_type="application/x-ndjson")
+    return StreamingResponse(_threaded_events(work), media_type="application/x-ndjson")
 
 
 @app.post("/api/generate")
@@ -218,67 +248,50 @@ def generate(req: GenerateRequest):
     # Resolve the init image (img2img) from the content-addressed store to a PIL.
     init_image = None
     if req.init_image_hash:
-        from PIL import Image
-
         path = db.IMAGES_DIR / f"{req.init_image_hash}.jpg"
         if not path.exists():
             raise HTTPException(status_code=404, detail="init image not found")
-        init_image = Image.open(path).convert("RGB")
+        init_image = sd.open_init_image(path)
 
-    def gen():
-        events: queue.Queue = queue.Queue()
-
-        def worker():
-            try:
-                events.put({"type": "status", "message": "Freeing VRAM (unloading vision model)…"})
-                try:
-                    oc.unload_all(req.ollama_url)
-                except Exception:
-                    pass  # best-effort; Ollama may be remote or already free
-
-                params = {
-                    "mode": req.mode,
-                    "model": req.model,
-                    "prompt": req.prompt,
-                    "negative_prompt": req.negative_prompt,
-                    "steps": req.steps,
-                    "guidance": req.guidance,
-                    "strength": req.strength,
-                    "width": req.width,
-                    "height": req.height,
-                    "seed": req.seed,
-                    "init_image": init_image,
-                }
-                image, seed = sd.generate(
-                    params,
-                    on_step=lambda s, t: events.put({"type": "progress", "step": s, "total": t}),
-                    on_status=lambda m: events.put({"type": "status", "message": m}),
-                )
-                full = sd.pil_to_data_url(image)
-                thumb = sd.pil_to_data_url(image, max_size=64)
-                h = db.save_image(full, thumb)
-                events.put(
-                    {
-                        "type": "image",
-                        "hash": h,
-                        "seed": seed,
-                        "width": image.size[0],
-                        "height": image.size[1],
-                    }
-                )
-            except Exception as exc:
-                events.put({"type": "error", "message": str(exc)})
-            finally:
-                events.put(None)  # sentinel: worker done
-
-        threading.Thread(target=worker, daemon=True).start()
-        while True:
-            item = events.get()
-            if item is None:
-                break
-            yield json.dumps(item) + "\n"
+    def work(emit):
+        emit({"type": "status", "message": "Freeing VRAM (unloading vision model)…"})
+        try:
+            oc.unload_all(req.ollama_url)
+        except Exception:
+            pass  # best-effort; Ollama may be remote or already free
+
+        params = {
+            "mode": req.mode,
+            "model": req.model,
+            "prompt": req.prompt,
+            "negative_prompt": req.negative_prompt,
+            "steps": req.steps,
+            "guidance": req.guidance,
+            "strength": req.strength,
+            "width": req.width,
+            "height": req.height,
+            "seed": req.seed,
+            "init_image": init_image,
+        }
+        image, seed = sd.generate(
+            params,
+            on_step=lambda s, t: emit({"type": "progress", "step": s, "total": t}),
+            on_status=lambda m: emit({"type": "status", "message": m}),
+        )
+        full = sd.pil_to_jpeg(image)
+        thumb = sd.pil_to_jpeg(image, max_size=64)
+        h = db.save_image_bytes(full, thumb)
+        emit(
+            {
+                "type": "image",
+                "hash": h,
+                "seed": seed,
+                "width": image.size[0],
+                "height": image.size[1],
+            }
+        )
 
-    return StreamingResponse(gen(), media_type="application/x-ndjson")
+    return StreamingResponse(_threaded_events(work), media_type="application/x-ndjson")
 
 
 # --------------------------------------------------------------------------- #
@@ -347,7 +360,9 @@ def make_title(chat_id: str, req: TitleRequest):
     if not exchange:
         raise HTTPException(status_code=404, detail="Chat has no messages")
     first_user, first_assistant = exchange
-    title = oc.generate_title(req.ollama_url, req.model, first_user, first_assistant)
+    title = oc.generate_title(
+        req.ollama_url, req.model, first_user, first_assistant, keep_alive=req.keep_alive
+    )
     if title:
         db.set_title(chat_id, title)
     return {"title": title}
@@ -359,16 +374,33 @@ def remove_chat(chat_id: str):
     return {"ok": True}
 
 
-@app.on_event("shutdown")
-def _unload_on_shutdown():
+# Hard cap on how long shutdown waits for Ollama to confirm the unloads.
+SHUTDOWN_UNLOAD_DEADLINE = 4
+
+
+def _unload_ollama_models():
+    # Short /api/ps probe: a stopped Ollama is the common case at shutdown
+    # (it's often stopped together with us) and shouldn't hold up the exit.
     try:
-        oc.unload_all(oc.DEFAULT_URL)
+        oc.unload_all(oc.DEFAULT_URL, timeout=0.5, unload_timeout=3)
     except Exception:
         pass
+
+
+@app.on_event("shutdown")
+def _unload_on_shutdown():
+    # requests timeouts bound each socket wait, not a whole call, so a hung or
+    # trickling Ollama could still stall exit. Run the unloads on a daemon
+    # thread alongside the local pipeline teardown and stop waiting at the
+    # deadline. Anything unfinished is abandoned: Ollama's own keep_alive
+    # timer still evicts those models later.
+    worker = threading.Thread(target=_unload_ollama_models, daemon=True)
+    worker.start()
     try:
         sd.unload()
     except Exception:
         pass
+    worker.join(timeout=SHUTDOWN_UNLOAD_DEADLINE)
 
 
 # --------------------------------------------------------------------------- #
@@ -5,12 +5,35 @@ Ollama call. Logic here is ported from the previous Streamlit app
 (utils.py / app.py) and keeps the two load-bearing fixes from this branch:
 `"think": False` and a (connect, read) timeout split.
 """
+import hashlib
 import json
 import re
 import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
 import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.retry import Retry
+
+# orjson is an optional speedup for the NDJSON hot loops and the image-heavy chat
+# bodies; the stdlib json (which also accepts bytes) is a drop-in fallback.
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+    _JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    _loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+
+    def _dumps(obj):
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
 
 DEFAULT_URL = "http://localhost:11434"
 
@@ -18,7 +41,75 @@ DEFAULT_URL = "http://localhost:11434"
 # timeout so a cold model load on the first request doesn't look like a hang.
 CHAT_TIMEOUT = (10, 300)
 
+# Completed replies kept for exact-repeat requests (same url, model, history and
+# images). Keyed by a blake2b digest of the request body; values are the
+# replayable (text, usage) pair.
+CHAT_CACHE_SIZE = 64
+_chat_cache = OrderedDict()
+_chat_cache_lock = threading.Lock()
+
+# url -> (blake2b digest of the /api/tags body, list_models result).
+_models_cache = {}
+
+# url -> {(model name, model digest): supports vision} for the models installed
+# there. A model's capabilities can't change without its digest changing.
+_vision_cache = {}
+
+# /api/ps answers are reused this long; url -> (monotonic timestamp, models).
+PS_TTL = 2
+_ps_cache = {}
+
+# Read size for the NDJSON streams (chat, pull). Ollama sends chunked
+# responses, so a large size doesn't hold tokens back; it only means fewer
+# reads and less line-splitting overhead per network chunk than the 512 B default.
+STREAM_CHUNK = 64 * 1024
+ERROR_BODY_LIMIT = 512
+
+# Minimum spacing between forwarded `ollama pull` progress lines (~20 Hz).
+PULL_UPDATE_INTERVAL = 0.05
+
 GITHUB_LATEST = "https://api.github.com/repos/ollama/ollama/releases/latest"
+LATEST_TTL = 6 * 60 * 60
+
+# (monotonic timestamp, version) of the last successful GitHub lookup.
+_latest = None
+
+# One pooled session for every outbound call (chat, title, tags, show, pull,
+# delete, ps, unload, version) so requests reuse a keep-alive connection instead
+# of paying a fresh TCP handshake each time. Only connection failures are
+# retried: a read error mid-reply must surface, not silently re-run a chat.
+_POOL_SIZE = 8
+
+
+class _RefusedOnlyRetry(Retry):
+    """Retry refused connections (Ollama restarting), not connect timeouts.
+
+    A refused connect fails instantly, so retrying it is cheap; a connect
+    timeout (host down or blackholed) already cost the full connect timeout,
+    and repeating it would stretch the advertised ~10 s failure to ~30 s.
+    """
+
+    def increment(
+        self, method=None, url=None, response=None, error=None, *args, **kwargs
+    ):
+        if isinstance(error, ConnectTimeoutError) and not isinstance(
+            error, NewConnectionError  # urllib3 2 subclasses refusals from it
+        ):
+            spent = self.new(total=0)
+            return super(_RefusedOnlyRetry, spent).increment(
+                method, url, response, error, *args, **kwargs
+            )
+        return super().increment(method, url, response, error, *args, **kwargs)
+
+
+_SESSION = requests.Session()
+_ADAPTER = requests.adapters.HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=_POOL_SIZE,
+    max_retries=_RefusedOnlyRetry(total=2, read=0, status=0, backoff_factor=0.2),
+)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
 
 
 # --------------------------------------------------------------------------- #
@@ -36,7 +127,41 @@ def context_size_for(messages):
     return min(32768, max(8192, 4096 + 2048 * n_images))
 
 
-def stream_chat(url, model, messages):
+def _error_text(response):
+    """Short "Ollama returned <status>: <body>" message for a failed call.
+
+    Reads at most ERROR_BODY_LIMIT bytes: on a streaming response `.text`
+    would pull the whole body into memory just to build an error string.
+    """
+    body = next(response.iter_content(ERROR_BODY_LIMIT), b"")
+    return f"Ollama returned {response.status_code}: {body.decode('utf-8', 'replace')}"
+
+
+# Chat bodies are pre-serialized with orjson: they carry the base64 images,
+# often several MB, which the stdlib encoder scans char by char for escaping.
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _chat_payload(model, messages, num_ctx, stream, keep_alive=None):
+    """Build an /api/chat body. Shared by chat and titling so the two stay in
+    lockstep (`think: False`, explicit num_ctx).
+
+    `keep_alive` (seconds) overrides how long Ollama keeps the model loaded
+    after the request; None leaves Ollama's default (5 minutes).
+    """
+    payload = {
+        "model": model,
+        "messages": messages,
+        "stream": stream,
+        "think": False,
+        "options": {"num_ctx": num_ctx},
+    }
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+    return payload
+
+
+def stream_chat(url, model, messages, keep_alive=None):
     """POST to Ollama's /api/chat and yield streaming events.
 
     Yields dicts: {"type": "token", "text": ...} for content, and a final
@@ -45,76 +170,110 @@ def stream_chat(url, model, messages):
     truth for the context-usage meter.
 
     Sends `think: False` so reasoning-capable models answer directly, and a
-    `num_ctx` sized to fit the request's images (see context_size_for).
+    `num_ctx` sized to fit the request's images (see context_size_for), and
+    `keep_alive` when the caller set one.
     """
     num_ctx = context_size_for(messages)
-    payload = {
-        "model": model,
-        "messages": messages,
-        "stream": True,
-        "think": False,
-        "options": {"num_ctx": num_ctx},
-    }
-    response = requests.post(
+    payload = _chat_payload(model, messages, num_ctx, stream=True, keep_alive=keep_alive)
+
+    # Asking the exact same thing again (same model, history and images) replays
+    # the stored reply instead of paying for another multi-second generation.
+    body = _dumps(payload)
+    key = hashlib.blake2b(url.encode() + b"\0" + body, digest_size=16).digest()
+    with _chat_cache_lock:
+        cached = _chat_cache.get(key)
+        if cached is not None:
+            _chat_cache.move_to_end(key)
+    if cached is not None:
+        text, usage = cached
+        if text:
+            yield {"type": "token", "text": text}
+        yield usage
+        return
+
+    # The `with` block closes the upstream connection (it is dropped, not returned
+    # to the pool, when the body wasn't fully read) as soon as this generator is
+    # closed — including when the browser hits Stop and the StreamingResponse
+    # drops us mid-stream. Ollama sees the disconnect and cancels generation
+    # instead of finishing a reply nobody will read.
+    with _SESSION.post(
         f"{url}/api/chat",
-        json=payload,
+        data=body,
+        headers=_JSON_HEADERS,
         stream=True,
         timeout=CHAT_TIMEOUT,
-    )
-    if response.status_code != 200:
-        raise RuntimeError(f"Ollama returned {response.status_code}: {response.text}")
-
-    for line in response.iter_lines():
-        if not line:
-            continue
-        try:
-            chunk = json.loads(line)
-        except json.JSONDecodeError:
-            continue
-        content = (chunk.get("message") or {}).get("content")
-        if content:
-            yield {"type": "token", "text": content}
-        if chunk.get("done"):
-            prompt_tokens = chunk.get("prompt_eval_count") or 0
-            eval_tokens = chunk.get("eval_count") or 0
-            yield {
-                "type": "usage",
-                "used": prompt_tokens + eval_tokens,
-                "prompt_tokens": prompt_tokens,
-                "eval_tokens": eval_tokens,
-                "num_ctx": num_ctx,
-            }
-
-
-def generate_title(url, model, first_user, first_assistant):
+    ) as response:
+        if response.status_code != 200:
+            raise RuntimeError(_error_text(response))
+
+        parts = []
+        usage = None
+        for line in response.iter_lines(chunk_size=STREAM_CHUNK):
+            if not line:
+                continue
+            try:
+                chunk = _loads(line)
+            except _JSONDecodeError:
+                continue
+            content = (chunk.get("message") or {}).get("content")
+            if content:
+                parts.append(content)
+                yield {"type": "token", "text": content}
+            if chunk.get("done"):
+                prompt_tokens = chunk.get("prompt_eval_count") or 0
+                eval_tokens = chunk.get("eval_count") or 0
+                usage = {
+                    "type": "usage",
+                    "used": prompt_tokens + eval_tokens,
+                    "prompt_tokens": prompt_tokens,
+                    "eval_tokens": eval_tokens,
+                    "num_ctx": num_ctx,
+                }
+                # No break: keep reading to EOF (the chunked body's terminator
+                # follows right away) so the connection goes back to the pool
+                # for the next chat instead of being dropped with the `with`.
+
+        # Only a reply that ran to completion is cached; a stopped or failed
+        # stream never reaches this point.
+        if usage is not None:
+            with _chat_cache_lock:
+                _chat_cache[key] = ("".join(parts), usage)
+                if len(_chat_cache) > CHAT_CACHE_SIZE:
+                    _chat_cache.popitem(last=False)
+            yield usage
+
+
+TITLE_SYSTEM_PROMPT = (
+    "You write short conversation titles. Reply with ONLY a 3 to 6 word "
+    "title. No quotes, no trailing punctuation, no preamble."
+)
+
+
+def generate_title(url, model, first_user, first_assistant, keep_alive=None):
     """Ask the model for a short conversation title from the first exchange.
 
     Text-only (no images) so the vision context doesn't have to reload just to
     name a chat. Returns a cleaned 3-6 word title, capped in length. Reuses the
     same `think: False` behavior as chat and fails soft (returns "" on error).
+    `keep_alive` should match the chat's, or this follow-up request would
+    reset (or, at 0, undo) how long the model stays loaded.
     """
-    system = (
-        "You write short conversation titles. Reply with ONLY a 3 to 6 word "
-        "title. No quotes, no trailing punctuation, no preamble."
-    )
     user = f"User asked: {first_user}\n\nAssistant replied: {first_assistant[:500]}"
-    payload = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ],
-        "stream": False,
-        "think": False,
-        "options": {"num_ctx": 4096},
-    }
+    messages = [
+        {"role": "system", "content": TITLE_SYSTEM_PROMPT},
+        {"role": "user", "content": user},
+    ]
+    payload = _chat_payload(model, messages, 4096, stream=False, keep_alive=keep_alive)
     try:
-        response = requests.post(
-            f"{url}/api/chat", json=payload, timeout=CHAT_TIMEOUT
+        response = _SESSION.post(
+            f"{url}/api/chat",
+            data=_dumps(payload),
+            headers=_JSON_HEADERS,
+            timeout=CHAT_TIMEOUT,
         )
         if response.status_code != 200:
             return ""
-        text = (response.json().get("message") or {}).get("content", "")
+        text = (_loads(response.content).get("message") or {}).get("content", "")
     except (requests.RequestException, ValueError):
         return ""
 
@@ -127,17 +286,28 @@ def generate_title(url, model, first_user, first_assistant):
 # --------------------------------------------------------------------------- #
 # Models
 # --------------------------------------------------------------------------- #
+# Fallback vision markers for Ollama versions without `capabilities`. One
+# case-insensitive pass over the (often long) modelfile instead of a lowercased
+# copy plus a substring scan per keyword. "vision" also covers "vision_tower".
+_VISION_MODELFILE_RE = re.compile(r"vision|visual|clip|mm_projector|image_processor", re.I)
+_VISION_TEMPLATE_RE = re.compile(r"\[img", re.I)
+
+
 def is_vision_model(url, model_name):
-    """Check if a model supports vision by inspecting its details."""
+    """Check if a model supports vision by inspecting its details.
+
+    Returns None (not False) when Ollama couldn't answer, so callers can tell a
+    failed probe from a text-only model and avoid caching it.
+    """
     try:
-        response = requests.post(
+        response = _SESSION.post(
             f"{url}/api/show",
             json={"name": model_name},
             timeout=10,
         )
         if response.status_code != 200:
-            return False
-        info = response.json()
+            return None
+        info = _loads(response.content)
 
         # Capabilities are authoritative on modern Ollama — trust them. (The old
         # keyword heuristic gave false positives, e.g. qwen2.5 whose modelfile
@@ -147,87 +317,180 @@ def is_vision_model(url, model_name):
             return "vision" in capabilities
 
         # Fallback only for older Ollama that doesn't report capabilities.
-        modelfile = (info.get("modelfile") or "").lower()
-        template = (info.get("template") or "").lower()
-        indicators = [
-            "vision" in modelfile,
-            "visual" in modelfile,
-            "[img" in template,
-            "clip" in modelfile,
-            "mm_projector" in modelfile,
-            "vision_tower" in modelfile,
-            "image_processor" in modelfile,
-        ]
-        return any(indicators)
-    except requests.RequestException:
-        return False
+        return bool(
+            _VISION_MODELFILE_RE.search(info.get("modelfile") or "")
+            or _VISION_TEMPLATE_RE.search(info.get("template") or "")
+        )
+    except (requests.RequestException, ValueError):
+        return None
 
 
-def list_vision_models(url):
-    """Return sorted names of installed vision-capable models."""
+def _tags(url):
+    """Raw /api/tags body, or None if Ollama is unreachable or errors."""
     try:
-        response = requests.get(f"{url}/api/tags", timeout=5)
+        response = _SESSION.get(f"{url}/api/tags", timeout=5)
         if response.status_code != 200:
-            return []
-        models = response.json().get("models", [])
-        vision = [m["name"] for m in models if is_vision_model(url, m["name"])]
-        return sorted(vision)
+            return None
+        return response.content
     except requests.RequestException:
-        return []
+        return None
+
+
+def list_models(url):
+    """Return {"vision": [...], "all": [...]} from a single /api/tags fetch.
 
+    Both lists come from the same tag listing, so fetch it once and derive the
+    sorted vision subset from it rather than paying a second round trip.
 
-def list_all_models(url):
-    """Return names of every installed model (for the remove dropdown)."""
+    Ollama sends no ETag, so the body's digest stands in for one: while the
+    installed set is unchanged, the previous result (and its per-model
+    /api/show vision probes) is reused as-is. When it does change, only
+    models not probed before (by name + digest) are probed, concurrently over
+    the pooled session. Failed probes are never cached, so a transient error
+    doesn't hide a vision model until the next install.
+    """
+    body = _tags(url)
+    if not body:
+        return {"vision": [], "all": []}
+    digest = hashlib.blake2b(body, digest_size=16).digest()
+    cached = _models_cache.get(url)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
     try:
-        response = requests.get(f"{url}/api/tags", timeout=5)
-        if response.status_code != 200:
-            return []
-        return [m["name"] for m in response.json().get("models", [])]
-    except requests.RequestException:
-        return []
+        models = _loads(body).get("models", [])
+    except ValueError:  # not JSON, e.g. the URL points at some other web server
+        return {"vision": [], "all": []}
+    keys = [(m["name"], m.get("digest")) for m in models]
+    known = _vision_cache.get(url, {})
+    flags = {k: known[k] for k in keys if k in known}
+    misses = [k for k in keys if k not in flags]
+    if misses:
+        with ThreadPoolExecutor(max_workers=min(len(misses), _POOL_SIZE)) as pool:
+            probes = pool.map(lambda k: is_vision_model(url, k[0]), misses)
+            for key, ok in zip(misses, probes):
+                if ok is not None:
+                    flags[key] = ok
+    _vision_cache[url] = flags  # also drops models that were removed
+    result = {
+        "vision": sorted(name for name, d in keys if flags.get((name, d))),
+        "all": [name for name, _ in keys],
+    }
+    if len(flags) == len(keys):
+        _models_cache[url] = (digest, result)
+    return result
 
 
 def pull(url, name):
-    """Stream `ollama pull` progress as raw JSON status lines."""
-    response = requests.post(
+    """Stream `ollama pull` progress as raw JSON status lines, throttled.
+
+    Ollama emits a progress line per received chunk — thousands for a multi-GB
+    layer — and each one becomes a UI update on the client. Forward a line only
+    when the status changes (e.g. "pulling manifest" -> "pulling <digest>") or
+    PULL_UPDATE_INTERVAL has passed, and always forward the last one.
+    """
+    response = _SESSION.post(
         f"{url}/api/pull",
         json={"name": name},
         stream=True,
         timeout=600,
     )
     if response.status_code != 200:
-        raise RuntimeError(f"Ollama returned {response.status_code}: {response.text}")
-    for line in response.iter_lines():
-        if line:
+        raise RuntimeError(_error_text(response))
+    last_status = None
+    last_sent = 0.0
+    pending = None
+    for line in response.iter_lines(chunk_size=STREAM_CHUNK):
+        if not line:
+            continue
+        try:
+            status = _loads(line).get("status")
+        except _JSONDecodeError:
+            continue
+        now = time.monotonic()
+        if status != last_status and pending is not None:
+            yield pending.decode("utf-8") + "\n"  # finish the previous phase
+        if status != last_status or now - last_sent >= PULL_UPDATE_INTERVAL:
             yield line.decode("utf-8") + "\n"
+            last_status, last_sent, pending = status, now, None
+        else:
+            pending = line
+    if pending is not None:
+        yield pending.decode("utf-8") + "\n"
 
 
 def delete(url, name):
-    response = requests.delete(f"{url}/api/delete", json={"name": name}, timeout=30)
+    response = _SESSION.delete(f"{url}/api/delete", json={"name": name}, timeout=30)
     response.raise_for_status()
     return True
 
 
-def running(url):
-    response = requests.get(f"{url}/api/ps", timeout=5)
+def running(url, timeout=5, fresh=False):
+    """Loaded models from /api/ps, reused for PS_TTL seconds.
+
+    Back-to-back "Show running" clicks (and the sidebar re-checking) would
+    otherwise each pay an identical round trip. `fresh=True` skips the cache
+    for callers that act on the answer (unloading).
+    """
+    cached = _ps_cache.get(url)
+    if not fresh and cached is not None and time.monotonic() - cached[0] < PS_TTL:
+        return cached[1]
+    response = _SESSION.get(f"{url}/api/ps", timeout=timeout)
     response.raise_for_status()
-    return response.json().get("models", [])
+    models = _loads(response.content).get("models", [])
+    _ps_cache[url] = (time.monotonic(), models)
+    return models
 
 
-def unload_all(url):
-    """Unload every loaded model to free VRAM. Returns the names unloaded."""
-    unloaded = []
-    for model in running(url):
-        name = model.get("name", "")
-        if not name:
-            continue
-        requests.post(
+def _unload(url, name, timeout=10):
+    """Ask Ollama to evict one model. Returns None on success, else the error."""
+    try:
+        response = _SESSION.post(
             f"{url}/api/generate",
             json={"model": name, "keep_alive": 0},
-            timeout=10,
+            timeout=timeout,
         )
-        unloaded.append(name)
-    return unloaded
+    except requests.RequestException as exc:
+        return str(exc)
+    if response.status_code != 200:
+        return _error_text(response)
+    return None
+
+
+def unload_all(url, timeout=5, unload_timeout=10):
+    """Unload every loaded model to free VRAM.
+
+    Returns {"unloaded": [names], "failed": {name: error}} so one model that
+    refuses to unload doesn't hide the others that did. The per-model unloads
+    are independent (no GPU work, just Ollama evicting a runner), so they are
+    issued concurrently rather than one RTT after another. `timeout` bounds
+    the initial /api/ps probe and `unload_timeout` each (parallel) unload, so
+    the whole call takes at most about their sum.
+    """
+    names = [m.get("name", "") for m in running(url, timeout=timeout, fresh=True)]
+    names = [n for n in names if n]
+    result = {"unloaded": [], "failed": {}}
+    if not names:
+        return result
+    # Plain daemon threads, not a ThreadPoolExecutor: concurrent.futures joins
+    # its workers at interpreter exit, so one hung unload would hold the
+    # process past main's shutdown deadline. Only a few models are ever loaded.
+    errors = {}
+
+    def work(name):
+        errors[name] = _unload(url, name, unload_timeout)
+
+    threads = [threading.Thread(target=work, args=(n,), daemon=True) for n in names]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for name in names:
+        if errors[name] is None:
+            result["unloaded"].append(name)
+        else:
+            result["failed"][name] = errors[name]
+    _ps_cache.pop(url, None)  # the next "Show running" must reflect the unload
+    return result
 
 
 # --------------------------------------------------------------------------- #
@@ -245,21 +508,33 @@ def is_local(url):
 
 def installed_version(url):
     try:
-        response = requests.get(f"{url}/api/version", timeout=5)
+        response = _SESSION.get(f"{url}/api/version", timeout=5)
         if response.status_code == 200:
-            return response.json().get("version")
-    except requests.RequestException:
+            return _loads(response.content).get("version")
+    except (requests.RequestException, ValueError):
         pass
     return None
 
 
 def latest_version():
+    """Latest Ollama release tag, cached for LATEST_TTL seconds.
+
+    The update banner asks on every page load, but releases land days apart, so
+    a successful lookup is reused instead of hitting GitHub each time. Failures
+    are not cached, so a transient error is retried on the next request.
+    """
+    global _latest
+    if _latest is not None and time.monotonic() - _latest[0] < LATEST_TTL:
+        return _latest[1]
     try:
-        response = requests.get(GITHUB_LATEST, timeout=5)
+        response = _SESSION.get(GITHUB_LATEST, timeout=5)
         if response.status_code == 200:
-            tag = response.json().get("tag_name", "")
-            return tag.lstrip("v") or None
-    except requests.RequestException:
+            tag = _loads(response.content).get("tag_name", "")
+            version = tag.lstrip("v") or None
+            if version:
+                _latest = (time.monotonic(), version)
+            return version
+    except (requests.RequestException, ValueError):
         pass
     return None
 
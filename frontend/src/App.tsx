@@ -20,11 +20,19 @@ import {
   type SdInfo,
   type Usage,
 } from "./api";
-import { fileToResizedDataUrl, resizeDataUrl, rotateDataUrl } from "./fileUtils";
+import {
+  clearImageCaches,
+  fileToResizedDataUrl,
+  rotateDataUrl,
+  thumbnailFor,
+} from "./fileUtils";
 import { trimHistory } from "./context";
+import { tokenBuffer } from "./tokenBuffer";
 import type { ChatMessage, ChatSummary, GenSettings } from "./types";
 
 const DEFAULT_URL = "http://localhost:11434";
+// Seconds Ollama keeps the chat model loaded after a reply (its own default).
+const DEFAULT_KEEP_ALIVE = 300;
 
 /** Extract the sha256 hash from an image/thumb URL like /api/images/<hash>.jpg */
 function hashFromUrl(url: string): string {
@@ -40,6 +48,10 @@ export default function App() {
     all: [],
   });
   const [model, setModel] = useState(() => localStorage.getItem("model") || "");
+  const [keepAlive, setKeepAlive] = useState(() => {
+    const stored = Math.round(Number(localStorage.getItem("keepAlive") ?? NaN));
+    return Number.isFinite(stored) && stored >= 0 ? stored : DEFAULT_KEEP_ALIVE;
+  });
   const [systemPrompt, setSystemPrompt] = useState("");
   const [systemImage, setSystemImage] = useState<string | null>(null);
 
@@ -79,6 +91,9 @@ export default function App() {
   );
   const [chatExists, setChatExists] = useState(false);
   // data-URL -> content hash, so re-sent pinned images aren't re-uploaded.
+  // Keys are whole data-URLs (megabytes each), so it only covers the open chat
+  // and is reset on every switch (with fileUtils' caches) rather than pinning
+  // every image ever viewed.
   const hashCache = useRef<Map<string, string>>(new Map());
   // True while the pinned Images panel is "focused" (clicked). Pasted images are
   // routed there instead of to the message composer while it's armed.
@@ -87,17 +102,40 @@ export default function App() {
     pasteToPinnedRef.current = v;
   }, []);
 
-  /** Upload any not-yet-stored images and return their hashes (order-preserved). */
+  // data-URL -> in-flight upload, so overlapping persists (the metadata sync and
+  // a send's finally) and repeats within one call share a single upload.
+  const pendingHashes = useRef<Map<string, Promise<string>>>(new Map());
+  // image slot ("pinned:2", "composer:0") -> quarter turns clicked while its
+  // rotation is being drawn. Keyed by slot, not data-URL: the same file
+  // attached twice yields the identical string, and each copy rotates on its
+  // own. Clicks that land mid-draw only bump the count; the draw then catches
+  // up to the net angle once, so a rapid ↻↻↻↻ costs one encode (or none)
+  // instead of four.
+  const pendingTurns = useRef<Map<string, number>>(new Map());
+
+  /** Upload any not-yet-stored images and return their hashes (order-preserved).
+   *  All misses go up in one /api/images request rather than one per image. */
   const ensureHashes = useCallback(async (urls: string[]): Promise<string[]> => {
+    const misses = [...new Set(urls)].filter(
+      (url) => !hashCache.current.has(url) && !pendingHashes.current.has(url)
+    );
+    if (misses.length) {
+      const batch = Promise.all(
+        misses.map(async (url) => ({ full: url, thumb: await thumbnailFor(url) }))
+      ).then(uploadImages);
+      misses.forEach((url, i) => {
+        const pending = batch.then((hashes) => {
+          hashCache.current.set(url, hashes[i]);
+          return hashes[i];
+        });
+        pendingHashes.current.set(url, pending);
+        // Drop the entry once settled: success lands in hashCache, and a failed
+        // upload should be retried by the next call.
+        pending.finally(() => pendingHashes.current.delete(url)).catch(() => {});
+      });
+    }
     return Promise.all(
-      urls.map(async (url) => {
-        const cached = hashCache.current.get(url);
-        if (cached) return cached;
-        const thumb = await resizeDataUrl(url, 64);
-        const [hash] = await uploadImages([{ full: url, thumb }]);
-        hashCache.current.set(url, hash);
-        return hash;
-      })
+      urls.map((url) => hashCache.current.get(url) ?? pendingHashes.current.get(url)!)
     );
   }, []);
 
@@ -117,14 +155,41 @@ export default function App() {
   function removePinned(i: number) {
     setPinnedImages((prev) => prev.filter((_, idx) => idx !== i));
   }
-  async function rotatePinned(i: number) {
-    const rotated = await rotateDataUrl(pinnedImages[i], 90);
-    setPinnedImages((prev) => prev.map((img, idx) => (idx === i ? rotated : img)));
+  async function queueRotation(
+    list: "pinned" | "composer",
+    i: number,
+    src: string,
+    apply: (update: (prev: string[]) => string[]) => void
+  ) {
+    const key = `${list}:${i}`;
+    const turns = pendingTurns.current;
+    const queued = turns.get(key);
+    if (queued !== undefined) {
+      turns.set(key, queued + 1);
+      return;
+    }
+    turns.set(key, 1);
+    let drawn = 0;
+    let rotated = src;
+    try {
+      while (drawn !== turns.get(key)) {
+        drawn = turns.get(key)!;
+        rotated = await rotateDataUrl(src, (drawn % 4) * 90);
+      }
+    } finally {
+      turns.delete(key);
+    }
+    // Skip if the slot changed meanwhile (image removed or replaced).
+    apply((prev) => prev.map((img, idx) => (idx === i && img === src ? rotated : img)));
+  }
+  function rotatePinned(i: number) {
+    queueRotation("pinned", i, pinnedImages[i], setPinnedImages);
   }
 
   // Persist settings.
   useEffect(() => localStorage.setItem("ollamaUrl", ollamaUrl), [ollamaUrl]);
   useEffect(() => localStorage.setItem("model", model), [model]);
+  useEffect(() => localStorage.setItem("keepAlive", String(keepAlive)), [keepAlive]);
 
   const refreshModels = useCallback(async () => {
     try {
@@ -194,6 +259,8 @@ export default function App() {
 
   const newChat = useCallback(() => {
     abortRef.current?.abort();
+    hashCache.current.clear();
+    clearImageCaches();
     setCurrentChatId(crypto.randomUUID());
     setChatExists(false);
     setMessages([]);
@@ -210,19 +277,30 @@ export default function App() {
     try {
       abortRef.current?.abort();
       const d = await getChat(id);
+      hashCache.current.clear();
+      clearImageCaches();
 
       // Load images back into memory as data-URLs and pre-seed the hash cache
       // so they aren't re-uploaded on the next send. A missing file (e.g. one a
       // past GC removed) resolves to null so we can drop it instead of showing a
       // broken image or re-persisting a dead reference.
-      const loadImg = async (url: string): Promise<string | null> => {
-        try {
-          const data = await urlToDataUrl(url);
-          hashCache.current.set(data, hashFromUrl(url));
-          return data;
-        } catch {
-          return null;
+      // The same stored image recurs across a chat (pinned, then in every later
+      // turn's context list); URLs are content-addressed, so fetch and encode
+      // each one once and share the resulting string.
+      const loaded = new Map<string, Promise<string | null>>();
+      const loadImg = (url: string): Promise<string | null> => {
+        let pending = loaded.get(url);
+        if (!pending) {
+          pending = urlToDataUrl(url).then(
+            (data) => {
+              hashCache.current.set(data, hashFromUrl(url));
+              return data;
+            },
+            () => null
+          );
+          loaded.set(url, pending);
         }
+        return pending;
       };
       const present = (arr: (string | null)[]) =>
         arr.filter((x): x is string => x !== null);
@@ -390,6 +468,18 @@ export default function App() {
       payload.push(...merged);
 
       let assistantText = "";
+      // Tokens are appended to the visible reply in batches (see tokenBuffer),
+      // not one state update per token.
+      const tokens = tokenBuffer((chunk) =>
+        setMessages((prev) => {
+          // The list may have been swapped out (New chat / opened another one).
+          const last = prev[prev.length - 1];
+          if (last?.role !== "assistant") return prev;
+          const next = [...prev];
+          next[next.length - 1] = { ...last, content: last.content + chunk };
+          return next;
+        })
+      );
       const controller = new AbortController();
       abortRef.current = controller;
       try {
@@ -397,20 +487,15 @@ export default function App() {
           ollamaUrl,
           model,
           payload,
+          keepAlive,
           {
             onToken: (token) => {
               assistantText += token;
-              setMessages((prev) => {
-                const next = [...prev];
-                next[next.length - 1] = {
-                  ...next[next.length - 1],
-                  content: next[next.length - 1].content + token,
-                };
-                return next;
-              });
+              tokens.push(token);
             },
             onUsage: (u) => setUsage(u),
-            onError: (msg) =>
+            onError: (msg) => {
+              tokens.flush();
               setMessages((prev) => {
                 const next = [...prev];
                 next[next.length - 1] = {
@@ -419,7 +504,8 @@ export default function App() {
                     (next[next.length - 1].content || "") + `\n\n⚠️ ${msg}`,
                 };
                 return next;
-              }),
+              });
+            },
           },
           controller.signal
         );
@@ -428,6 +514,10 @@ export default function App() {
           setError(`Could not reach Ollama at ${ollamaUrl}`);
         }
       } finally {
+        // After an abort the messages may belong to another chat by now, so
+        // drop the tail instead of appending it to whatever is on screen.
+        if (controller.signal.aborted) tokens.cancel();
+        else tokens.flush();
         setStreaming(false);
         abortRef.current = null;
 
@@ -461,7 +551,7 @@ export default function App() {
           });
 
           if (isFirstExchange) {
-            await generateTitle(chatId, model, ollamaUrl).catch(() => "");
+            await generateTitle(chatId, model, ollamaUrl, keepAlive).catch(() => "");
           }
           await refreshChats();
         } catch (err) {
@@ -472,6 +562,7 @@ export default function App() {
     [
       messages,
       model,
+      keepAlive,
       ollamaUrl,
       systemPrompt,
       systemImage,
@@ -594,7 +685,7 @@ export default function App() {
               image_hashes: [resultHash],
             });
             if (isFirstExchange && model) {
-              await generateTitle(chatId, model, ollamaUrl).catch(() => "");
+              await generateTitle(chatId, model, ollamaUrl, keepAlive).catch(() => "");
             }
             await refreshChats();
             await getSdInfo().then(setSdInfo).catch(() => {});
@@ -607,6 +698,7 @@ export default function App() {
     [
       gen,
       model,
+      keepAlive,
       ollamaUrl,
       systemPrompt,
       systemImage,
@@ -624,12 +716,14 @@ export default function App() {
   // whole width — unobstructed by the left image panel.
   const [composerText, setComposerText] = useState("");
   const [composerImages, setComposerImages] = useState<string[]>([]);
-  async function addComposerFiles(files: FileList | File[]) {
+  // Stable identity so the memoized <Chat> (its drop handler) isn't re-rendered
+  // by every keystroke in the composer.
+  const addComposerFiles = useCallback(async (files: FileList | File[]) => {
     const list = Array.from(files).filter((f) => f.type.startsWith("image/"));
     if (list.length === 0) return;
     const urls = await Promise.all(list.map((f) => fileToResizedDataUrl(f)));
     setComposerImages((prev) => [...prev, ...urls]);
-  }
+  }, []);
   function removeComposerImage(i: number) {
     setComposerImages((prev) => prev.filter((_, idx) => idx !== i));
   }
@@ -651,9 +745,8 @@ export default function App() {
     window.addEventListener("paste", onPaste);
     return () => window.removeEventListener("paste", onPaste);
   }, []);
-  async function rotateComposerImage(i: number) {
-    const rotated = await rotateDataUrl(composerImages[i], 90);
-    setComposerImages((prev) => prev.map((img, idx) => (idx === i ? rotated : img)));
+  function rotateComposerImage(i: number) {
+    queueRotation("composer", i, composerImages[i], setComposerImages);
   }
   function submitComposer() {
     const trimmed = composerText.trim();
@@ -678,6 +771,8 @@ export default function App() {
       <Sidebar
         ollamaUrl={ollamaUrl}
         setOllamaUrl={setOllamaUrl}
+        keepAlive={keepAlive}
+        setKeepAlive={setKeepAlive}
         models={models}
         refreshModels={refreshModels}
         chats={chats}
@@ -41,13 +41,20 @@ export async function getRunning(ollamaUrl: string): Promise<RunningModel[]> {
   return (await res.json()).models ?? [];
 }
 
-export async function unloadAll(ollamaUrl: string): Promise<string[]> {
+export interface UnloadResult {
+  unloaded: string[];
+  /** model name -> error, for models Ollama failed to evict. */
+  failed: Record<string, string>;
+}
+
+export async function unloadAll(ollamaUrl: string): Promise<UnloadResult> {
   const res = await fetch(
     `/api/models/unload?ollama_url=${encodeURIComponent(ollamaUrl)}`,
     { method: "POST" }
   );
   if (!res.ok) throw new Error(`unload: ${res.status}`);
-  return (await res.json()).unloaded ?? [];
+  const data = await res.json();
+  return { unloaded: data.unloaded ?? [], failed: data.failed ?? {} };
 }
 
 export async function deleteModel(ollamaUrl: string, name: string): Promise<void> {
@@ -99,6 +106,7 @@ export async function streamChat(
   ollamaUrl: string,
   model: string,
   messages: ChatMessage[],
+  keepAlive: number,
   handlers: ChatHandlers,
   signal?: AbortSignal
 ): Promise<void> {
@@ -108,6 +116,7 @@ export async function streamChat(
     body: JSON.stringify({
       model,
       ollama_url: ollamaUrl,
+      keep_alive: keepAlive,
       messages: messages.map(withImages),
     }),
     signal,
@@ -126,6 +135,10 @@ export async function streamChat(
   });
 }
 
+// Pull progress is reported in 0.5% steps: finer increments aren't visible on
+// the bar, and each report is a React state update.
+const PULL_STEPS = 200;
+
 export async function pullModel(
   ollamaUrl: string,
   name: string,
@@ -140,12 +153,20 @@ export async function pullModel(
     }
   );
   if (!res.ok) throw new Error(`pull: ${res.status}`);
+  let lastStatus: string | null = null;
+  let lastStep: number | null = null;
   await readLines(res, (line) => {
     try {
       const d = JSON.parse(line);
-      const pct =
-        d.total && d.completed ? d.completed / d.total : null;
-      onStatus(d.status ?? "", pct);
+      const status = d.status ?? "";
+      const step =
+        d.total && d.completed
+          ? Math.floor((d.completed / d.total) * PULL_STEPS)
+          : null;
+      if (status === lastStatus && step === lastStep) return;
+      lastStatus = status;
+      lastStep = step;
+      onStatus(status, step === null ? null : step / PULL_STEPS);
     } catch {
       /* ignore non-json keepalives */
     }
@@ -319,12 +340,13 @@ export async function uploadImages(
 export async function generateTitle(
   id: string,
   model: string,
-  ollamaUrl: string
+  ollamaUrl: string,
+  keepAlive: number
 ): Promise<string> {
   const res = await fetch(`/api/chats/${id}/title`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ model, ollama_url: ollamaUrl }),
+    body: JSON.stringify({ model, ollama_url: ollamaUrl, keep_alive: keepAlive }),
   });
   if (!res.ok) throw new Error(`title: ${res.status}`);
   return (await res.json()).title ?? "";
@@ -1,16 +1,27 @@
-import { Fragment, useEffect, useRef, useState } from "react";
+import { Fragment, memo, useEffect, useRef, useState } from "react";
 import ReactMarkdown from "react-markdown";
 import remarkGfm from "remark-gfm";
 import type { ChatMessage } from "../types";
 
-/** Stable color per model name, for the per-chunk indicator. */
+const modelColors = new Map<string, string>();
+
+/** Stable color per model name, for the per-chunk indicator. Computed once per
+ *  name (a chat only ever involves a handful). */
 function modelColor(model?: string): string {
   if (!model) return "var(--border)";
-  let h = 0;
-  for (const c of model) h = (h * 31 + c.charCodeAt(0)) % 360;
-  return `hsl(${h} 60% 58%)`;
+  let color = modelColors.get(model);
+  if (color === undefined) {
+    let h = 0;
+    for (const c of model) h = (h * 31 + c.charCodeAt(0)) % 360;
+    color = `hsl(${h} 60% 58%)`;
+    modelColors.set(model, color);
+  }
+  return color;
 }
 
+// Module-level so every message render hands ReactMarkdown the same array.
+const REMARK_PLUGINS = [remarkGfm];
+
 const ORDINALS: Record<string, number> = {
   first: 1, second: 2, third: 3, fourth: 4, fifth: 5,
   sixth: 6, seventh: 7, eighth: 8, ninth: 9, tenth: 10,
@@ -41,8 +52,100 @@ interface Props {
   onDropFiles: (files: FileList | File[]) => void;
 }
 
-/** The scrolling conversation (the composer lives full-width below it). */
-export default function Chat({ messages, streaming, disabled, onDropFiles }: Props) {
+interface RowProps {
+  m: ChatMessage;
+  showModel: boolean;
+  /** Last message while a reply streams in: shows the cursor until text arrives. */
+  pending: boolean;
+  onZoom: (src: string) => void;
+}
+
+/** One message (plus its model divider). Its images load lazily and decode off
+ *  the main thread: a long chat holds many full-size data-URLs, and only the
+ *  ones scrolled into view need decoding. Memoized so a streaming flush, which
+ *  only replaces the last message object, re-renders just that row's markdown
+ *  rather than every message in the conversation. */
+const MessageRow = memo(function MessageRow({ m, showModel, pending, onZoom }: RowProps) {
+  const color = modelColor(m.model);
+  return (
+    <Fragment>
+      {showModel && (
+        <div className="model-divider">
+          <span className="model-chip" style={{ borderColor: color }}>
+            <span className="model-dot" style={{ background: color }} />
+            {m.model}
+          </span>
+        </div>
+      )}
+      <div className={`msg ${m.role}`}>
+        <div className="avatar">{m.role === "user" ? "🧑" : "🤖"}</div>
+        <div className="bubble" style={{ ["--mc" as string]: color }}>
+          {m.images && m.images.length > 0 && (
+            <div className="msg-images">
+              {m.images.map((src, j) => (
+                <img
+                  key={j}
+                  src={src}
+                  alt={`image ${j + 1}`}
+                  loading="lazy"
+                  decoding="async"
+                />
+              ))}
+            </div>
+          )}
+          {m.content ? (
+            m.role === "assistant" ? (
+              <div className="content markdown">
+                <ReactMarkdown
+                  remarkPlugins={REMARK_PLUGINS}
+                  // Keep our ctx:// placeholder scheme (default strips it).
+                  urlTransform={(url) => url}
+                  components={{
+                    img: ({ src, alt }) => {
+                      const ctx = m.contextImages;
+                      if (typeof src === "string" && src.startsWith("ctx://") && ctx) {
+                        const idx = parseInt(src.slice(6), 10);
+                        const img = ctx[idx];
+                        if (!img) return null;
+                        return (
+                          <button
+                            type="button"
+                            className="ctx-thumb"
+                            title="Referenced image — click to expand"
+                            onClick={() => onZoom(img)}
+                          >
+                            <img
+                              src={img}
+                              alt={`referenced image ${idx + 1}`}
+                              loading="lazy"
+                              decoding="async"
+                            />
+                          </button>
+                        );
+                      }
+                      return <img src={src} alt={alt} />;
+                    },
+                  }}
+                >
+                  {annotateImageRefs(m.content, m.contextImages?.length ?? 0)}
+                </ReactMarkdown>
+              </div>
+            ) : (
+              <div className="content">{m.content}</div>
+            )
+          ) : (
+            pending && <span className="cursor">▋</span>
+          )}
+        </div>
+      </div>
+    </Fragment>
+  );
+});
+
+/** The scrolling conversation (the composer lives full-width below it).
+ *  Memoized: re-rendering every message's markdown is the expensive part of the
+ *  page, and composer typing / sidebar state changes never touch its props. */
+function Chat({ messages, streaming, disabled, onDropFiles }: Props) {
   const endRef = useRef<HTMLDivElement>(null);
   const [dragOver, setDragOver] = useState(false);
   const [zoom, setZoom] = useState<string | null>(null);
@@ -80,74 +183,15 @@ export default function Chat({ messages, streaming, disabled, onDropFiles }: Pro
             </p>
           </div>
         )}
-        {messages.map((m, i) => {
-          const prevModel = i > 0 ? messages[i - 1].model : undefined;
-          const showModel = !!m.model && m.model !== prevModel;
-          const color = modelColor(m.model);
-          return (
-            <Fragment key={i}>
-              {showModel && (
-                <div className="model-divider">
-                  <span className="model-chip" style={{ borderColor: color }}>
-                    <span className="model-dot" style={{ background: color }} />
-                    {m.model}
-                  </span>
-                </div>
-              )}
-              <div className={`msg ${m.role}`}>
-                <div className="avatar">{m.role === "user" ? "🧑" : "🤖"}</div>
-                <div className="bubble" style={{ ["--mc" as string]: color }}>
-                  {m.images && m.images.length > 0 && (
-                    <div className="msg-images">
-                      {m.images.map((src, j) => (
-                        <img key={j} src={src} alt={`image ${j + 1}`} />
-                      ))}
-                    </div>
-                  )}
-                  {m.content ? (
-                    m.role === "assistant" ? (
-                      <div className="content markdown">
-                        <ReactMarkdown
-                          remarkPlugins={[remarkGfm]}
-                          // Keep our ctx:// placeholder scheme (default strips it).
-                          urlTransform={(url) => url}
-                          components={{
-                            img: ({ src, alt }) => {
-                              const ctx = m.contextImages;
-                              if (typeof src === "string" && src.startsWith("ctx://") && ctx) {
-                                const idx = parseInt(src.slice(6), 10);
-                                const img = ctx[idx];
-                                if (!img) return null;
-                                return (
-                                  <button
-                                    type="button"
-                                    className="ctx-thumb"
-                                    title="Referenced image — click to expand"
-                                    onClick={() => setZoom(img)}
-                                  >
-                                    <img src={img} alt={`referenced image ${idx + 1}`} />
-                                  </button>
-                                );
-                              }
-                              return <img src={src} alt={alt} />;
-                            },
-                          }}
-                        >
-                          {annotateImageRefs(m.content, m.contextImages?.length ?? 0)}
-                        </ReactMarkdown>
-                      </div>
-                    ) : (
-                      <div className="content">{m.content}</div>
-                    )
-                  ) : (
-                    streaming &&
-                    i === messages.length - 1 && <span className="cursor">▋</span>
-                  )}
-                </div>
-              </div>
-            </Fragment>
-          );
-        })}
+        {messages.map((m, i) => (
+          <MessageRow
+            key={i}
+            m={m}
+            showModel={!!m.model && m.model !== (i > 0 ? messages[i - 1].model : undefined)}
+            pending={streaming && i === messages.length - 1}
+            onZoom={setZoom}
+          />
+        ))}
         <div ref={endRef} />
       </div>
       {zoom && (
@@ -158,3 +202,5 @@ export default function Chat({ messages, streaming, disabled, onDropFiles }: Pro
     </div>
   );
 }
+
+export default memo(Chat);
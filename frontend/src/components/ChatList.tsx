@@ -51,7 +51,7 @@ export default function ChatList({
               <div className="chat-icons">
                 {c.icons.length > 0 ? (
                   c.icons.map((src, i) => (
-                    <img key={i} src={src} alt="" />
+                    <img key={i} src={src} alt="" loading="lazy" decoding="async" />
                   ))
                 ) : (
                   <span className="chat-icon-blank">🗨️</span>
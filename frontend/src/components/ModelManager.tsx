@@ -48,8 +48,12 @@ export default function ModelManager({ ollamaUrl, allModels, onChanged }: Props)
 
   async function doUnload() {
     try {
-      const names = await unloadAll(ollamaUrl);
-      setNote(names.length ? `Unloaded ${names.length} model(s)` : "Nothing loaded");
+      const { unloaded, failed } = await unloadAll(ollamaUrl);
+      const failedNames = Object.keys(failed);
+      const parts: string[] = [];
+      if (unloaded.length) parts.push(`Unloaded ${unloaded.length} model(s)`);
+      if (failedNames.length) parts.push(`failed to unload ${failedNames.join(", ")}`);
+      setNote(parts.length ? parts.join("; ") : "Nothing loaded");
     } catch {
       setNote("Unload failed");
     }
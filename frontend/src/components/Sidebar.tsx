@@ -7,6 +7,8 @@ import type { ChatSummary } from "../types";
 interface Props {
   ollamaUrl: string;
   setOllamaUrl: (v: string) => void;
+  keepAlive: number;
+  setKeepAlive: (v: number) => void;
   models: { vision: string[]; all: string[] };
   refreshModels: () => void;
   chats: ChatSummary[];
@@ -20,6 +22,8 @@ export default function Sidebar(props: Props) {
   const {
     ollamaUrl,
     setOllamaUrl,
+    keepAlive,
+    setKeepAlive,
     models,
     refreshModels,
     chats,
@@ -29,6 +33,10 @@ export default function Sidebar(props: Props) {
     onDeleteChat,
   } = props;
   const [urlDraft, setUrlDraft] = useState(ollamaUrl);
+  // Raw text of the keep-alive field: only whole, non-negative numbers are
+  // committed (the backend takes integer seconds), and clearing the field
+  // mid-edit must not silently mean 0 = "unload right away".
+  const [keepAliveDraft, setKeepAliveDraft] = useState(String(keepAlive));
 
   return (
     <aside className="sidebar">
@@ -49,6 +57,24 @@ export default function Sidebar(props: Props) {
         </button>
       </div>
 
+      <label className="lbl" title="How long Ollama keeps the chat model in memory after a reply (0 = unload right away)">
+        ⏱ Keep model loaded (seconds)
+      </label>
+      <input
+        type="number"
+        min={0}
+        step={60}
+        value={keepAliveDraft}
+        onChange={(e) => {
+          setKeepAliveDraft(e.target.value);
+          const secs = Math.round(Number(e.target.value));
+          if (e.target.value.trim() !== "" && Number.isFinite(secs) && secs >= 0) {
+            setKeepAlive(secs);
+          }
+        }}
+        onBlur={() => setKeepAliveDraft(String(keepAlive))}
+      />
+
       <ChatList
         chats={chats}
         currentChatId={currentChatId}
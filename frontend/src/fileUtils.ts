@@ -1,18 +1,14 @@
-/** Read a File into a data-URL string (data:image/...;base64,...). */
-export function fileToDataUrl(file: File): Promise<string> {
-  return new Promise((resolve, reject) => {
-    const reader = new FileReader();
-    reader.onload = () => resolve(reader.result as string);
-    reader.onerror = reject;
-    reader.readAsDataURL(file);
-  });
-}
+// JPEG quality for every image we encode. The images go to Ollama (as base64)
+// on each send, and vision models rescale them to a few hundred px anyway, so
+// the last few quality points only buy payload size.
+const JPEG_QUALITY = 0.85;
 
 /** Normalize a data-URL image to a standard JPEG, downscaling so its longest
  *  side is <= maxDim. Always re-encodes via canvas (even when already small) so
  *  any browser-displayable source becomes a clean JPEG Ollama can decode — this
  *  avoids "Failed to load image" errors from unusual source encodings. Vision
- *  models also tokenize by resolution, so the downscale keeps context cheap. */
+ *  models also tokenize by resolution, so the downscale keeps context cheap.
+ *  Any <img>-loadable URL works as the source (e.g. an object URL). */
 export function resizeDataUrl(dataUrl: string, maxDim = 1280): Promise<string> {
   return new Promise((resolve, reject) => {
     const img = new Image();
@@ -24,21 +20,119 @@ export function resizeDataUrl(dataUrl: string, maxDim = 1280): Promise<string> {
       canvas.height = Math.round(img.height * scale);
       const ctx = canvas.getContext("2d");
       if (!ctx) return reject(new Error("no canvas ctx"));
+      // JPEG has no alpha: transparent pixels (PNG/WebP/GIF sources) would
+      // otherwise encode as black, so flatten onto white like a viewer would.
+      ctx.fillStyle = "#fff";
+      ctx.fillRect(0, 0, canvas.width, canvas.height);
       ctx.drawImage(img, 0, 0, canvas.width, canvas.height);
-      resolve(canvas.toDataURL("image/jpeg", 0.9));
+      const out = canvas.toDataURL("image/jpeg", JPEG_QUALITY);
+      if (maxDim > THUMB_SIZE) rememberThumb(out, canvas);
+      resolve(out);
     };
     img.onerror = reject;
     img.src = dataUrl;
   });
 }
 
-/** Read a File and downscale it in one step. */
-export async function fileToResizedDataUrl(file: File, maxDim = 1280): Promise<string> {
-  return resizeDataUrl(await fileToDataUrl(file), maxDim);
+// Longest side of the sidebar/context thumbnails stored next to each image.
+const THUMB_SIZE = 64;
+
+// Thumbnails for images this module just drew (output data-URL -> thumb),
+// cut from the canvas that is already decoded in memory. Uploading a freshly
+// attached or rotated image then doesn't decode the full JPEG a second time
+// just to shrink it.
+const THUMB_CACHE_SIZE = 32;
+const thumbs = new Map<string, string>();
+
+function rememberThumb(dataUrl: string, source: HTMLCanvasElement) {
+  const scale = THUMB_SIZE / Math.max(source.width, source.height, THUMB_SIZE);
+  const canvas = document.createElement("canvas");
+  canvas.width = Math.max(1, Math.round(source.width * scale));
+  canvas.height = Math.max(1, Math.round(source.height * scale));
+  const ctx = canvas.getContext("2d");
+  if (!ctx) return;
+  ctx.drawImage(source, 0, 0, canvas.width, canvas.height);
+  thumbs.set(dataUrl, canvas.toDataURL("image/jpeg", JPEG_QUALITY));
+  if (thumbs.size > THUMB_CACHE_SIZE) {
+    thumbs.delete(thumbs.keys().next().value as string);
+  }
+}
+
+/** The stored-thumbnail JPEG for a data-URL image: reused from the draw that
+ *  produced it when available, otherwise decoded and downscaled now. */
+export function thumbnailFor(dataUrl: string): Promise<string> {
+  const cached = thumbs.get(dataUrl);
+  return cached ? Promise.resolve(cached) : resizeDataUrl(dataUrl, THUMB_SIZE);
+}
+
+// Recently resized files, keyed by file identity, so attaching the same photo
+// again (to the pinned panel and a message, or after removing it) reuses the
+// result instead of decoding + re-encoding it. Small: entries hold data-URLs.
+const RESIZED_CACHE_SIZE = 16;
+const resizedFiles = new Map<string, Promise<string>>();
+
+/** Read a File and downscale it in one step. The <img> decodes straight from
+ *  an object URL over the file's bytes, so the full-size original is never
+ *  base64-encoded to a data-URL just to be decoded again; only the resized
+ *  result is. */
+export function fileToResizedDataUrl(file: File, maxDim = 1280): Promise<string> {
+  const key = `${file.name}|${file.size}|${file.lastModified}|${maxDim}`;
+  const cached = resizedFiles.get(key);
+  if (cached) {
+    // Refresh recency (Map iteration order is insertion order).
+    resizedFiles.delete(key);
+    resizedFiles.set(key, cached);
+    return cached;
+  }
+  const url = URL.createObjectURL(file);
+  const pending = resizeDataUrl(url, maxDim).finally(() => URL.revokeObjectURL(url));
+  resizedFiles.set(key, pending);
+  pending.catch(() => resizedFiles.delete(key)); // don't cache failures
+  if (resizedFiles.size > RESIZED_CACHE_SIZE) {
+    resizedFiles.delete(resizedFiles.keys().next().value as string);
+  }
+  return pending;
+}
+
+// Rotated results remember which image they came from and the net angle
+// (output data-URL -> {src, deg}). Rotating a result again works from that
+// original instead of re-encoding a re-encode, and an angle already produced
+// for the same original (e.g. ↻ back and forth) is reused as-is.
+const ROTATION_CACHE_SIZE = 32;
+const rotations = new Map<string, { src: string; deg: number }>();
+
+/** Rotate a data-URL image by `deg` (90 increments). */
+export async function rotateDataUrl(dataUrl: string, deg: number): Promise<string> {
+  const from = rotations.get(dataUrl);
+  const src = from ? from.src : dataUrl;
+  const net = ((((from ? from.deg : 0) + deg) % 360) + 360) % 360;
+  // Back to the starting orientation: that's the original, no redraw needed.
+  if (net === 0) return src;
+  for (const [out, r] of rotations) {
+    if (r.src === src && r.deg === net) return out;
+  }
+  const out = await drawRotated(src, net);
+  rotations.set(out, { src, deg: net });
+  if (rotations.size > ROTATION_CACHE_SIZE) {
+    rotations.delete(rotations.keys().next().value as string);
+  }
+  return out;
+}
+
+/** Forget every cached image above. Their keys and values are whole
+ *  data-URLs, so call this whenever the images on screen are swapped out
+ *  (New chat / opening another chat) rather than pin them for the session. */
+export function clearImageCaches() {
+  resizedFiles.clear();
+  thumbs.clear();
+  rotations.clear();
 }
 
-/** Rotate a data-URL image by `deg` (90 increments) via canvas. */
-export function rotateDataUrl(dataUrl: string, deg: number): Promise<string> {
+/** Draw `dataUrl` rotated by `deg` (0/90/180/270, clockwise) onto a canvas and
+ *  encode it as JPEG. Quarter turns use exact integer transforms rather than
+ *  ctx.rotate(rad): with no cos/sin rounding, every source pixel lands on a
+ *  destination pixel, so the draw is a plain copy with no resampling blur. */
+function drawRotated(dataUrl: string, deg: number): Promise<string> {
   return new Promise((resolve, reject) => {
     const img = new Image();
     img.onload = () => {
@@ -46,12 +140,16 @@ export function rotateDataUrl(dataUrl: string, deg: number): Promise<string> {
       const canvas = document.createElement("canvas");
       canvas.width = swap ? img.height : img.width;
       canvas.height = swap ? img.width : img.height;
+      const { width: w, height: h } = canvas;
       const ctx = canvas.getContext("2d");
       if (!ctx) return reject(new Error("no canvas ctx"));
-      ctx.translate(canvas.width / 2, canvas.height / 2);
-      ctx.rotate((deg * Math.PI) / 180);
-      ctx.drawImage(img, -img.width / 2, -img.height / 2);
-      resolve(canvas.toDataURL("image/jpeg", 0.95));
+      if (deg === 90) ctx.setTransform(0, 1, -1, 0, w, 0);
+      else if (deg === 180) ctx.setTransform(-1, 0, 0, -1, w, h);
+      else if (deg === 270) ctx.setTransform(0, -1, 1, 0, 0, h);
+      ctx.drawImage(img, 0, 0);
+      const out = canvas.toDataURL("image/jpeg", JPEG_QUALITY);
+      rememberThumb(out, canvas);
+      resolve(out);
     };
     img.onerror = reject;
     img.src = dataUrl;
@@ -0,0 +1,53 @@
+// Flush at most every FLUSH_MS (~25 Hz, faster than the eye can follow a
+// stream), or sooner once MAX_PENDING characters have piled up.
+const FLUSH_MS = 40;
+const MAX_PENDING = 512;
+
+export interface TokenBuffer {
+  push: (token: string) => void;
+  /** Emit whatever is pending now (call at end of stream / before an error). */
+  flush: () => void;
+  /** Drop whatever is pending without emitting it (the stream was aborted). */
+  cancel: () => void;
+}
+
+/** Coalesce streamed tokens into periodic flushes. Each flush is one React state
+ *  update (and one markdown re-render of the growing reply), so batching keeps
+ *  render cost tied to wall-clock time instead of to the model's token rate. */
+export function tokenBuffer(onFlush: (text: string) => void): TokenBuffer {
+  let pending: string[] = [];
+  let size = 0;
+  let timer: number | undefined;
+
+  const cancel = () => {
+    if (timer !== undefined) {
+      clearTimeout(timer);
+      timer = undefined;
+    }
+    pending = [];
+    size = 0;
+  };
+
+  const flush = () => {
+    if (timer !== undefined) {
+      clearTimeout(timer);
+      timer = undefined;
+    }
+    if (pending.length === 0) return;
+    const text = pending.join("");
+    pending = [];
+    size = 0;
+    onFlush(text);
+  };
+
+  return {
+    push(token: string) {
+      pending.push(token);
+      size += token.length;
+      if (size >= MAX_PENDING) flush();
+      else if (timer === undefined) timer = window.setTimeout(flush, FLUSH_MS);
+    },
+    flush,
+    cancel,
+  };
+}